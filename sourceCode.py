@@ -3,12 +3,15 @@ import time
 import os
 import ctypes
 from ctypes import wintypes, c_longlong
-from tkinter import colorchooser, StringVar, IntVar, DoubleVar, Toplevel, Frame, Label, Entry, Button, BooleanVar, OptionMenu, filedialog, Checkbutton
+from tkinter import colorchooser, StringVar, IntVar, DoubleVar, Toplevel, Frame, Label, Entry, Button, BooleanVar, filedialog, Checkbutton
 import tkinter.ttk as ttk
 import threading
-from pynput import mouse as pynput_mouse
-from typing import List, Tuple, Any, Dict
-import PIL.Image, PIL.ImageTk
+import collections
+import functools
+import json
+import types
+from typing import List, Tuple, Any, Dict, Callable, Deque, Sequence, Set, Mapping
+import PIL.Image, PIL.ImageTk, PIL.ImageDraw
 
 # --- ctypes Structures and Constants for Windows Raw Input API ---
 # These are necessary for capturing mouse movement deltas outside the app's window.
@@ -30,11 +33,25 @@ class RAWINPUTHEADER(ctypes.Structure):
         ('wParam', wintypes.WPARAM),
     ]
 
-class RAWMOUSE(ctypes.Structure):
+class RAWMOUSE_BUTTONS(ctypes.Structure):
     _fields_ = [
-        ('usFlags', wintypes.USHORT),
         ('usButtonFlags', wintypes.USHORT),
         ('usButtonData', wintypes.USHORT),
+    ]
+
+class RAWMOUSE_BUTTONS_UNION(ctypes.Union):
+    _anonymous_ = ('buttons',)
+    _fields_ = [
+        ('ulButtons', wintypes.ULONG),
+        ('buttons', RAWMOUSE_BUTTONS),
+    ]
+
+class RAWMOUSE(ctypes.Structure):
+    # The button union is ULONG-aligned, so it starts after two bytes of padding, not right after usFlags
+    _anonymous_ = ('u',)
+    _fields_ = [
+        ('usFlags', wintypes.USHORT),
+        ('u', RAWMOUSE_BUTTONS_UNION),
         ('ulRawButtons', wintypes.ULONG),
         ('lLastX', wintypes.LONG),
         ('lLastY', wintypes.LONG),
@@ -53,7 +70,30 @@ class RAWINPUT(ctypes.Structure):
 HID_USAGE_PAGE_GENERIC = 0x01
 HID_USAGE_GENERIC_MOUSE = 0x02
 RIDEV_INPUTSINK = 0x00000100
+RID_INPUT = 0x10000003
+RIM_TYPEMOUSE = 0
+# usButtonFlags bits for the buttons that leave click marks, as (flag, is_left, pressed).
+# Every button other than the left one gets the right click style.
+RAW_BUTTON_EVENTS = (
+    (0x0001, True, True),    # RI_MOUSE_LEFT_BUTTON_DOWN
+    (0x0002, True, False),   # RI_MOUSE_LEFT_BUTTON_UP
+    (0x0004, False, True),   # RI_MOUSE_RIGHT_BUTTON_DOWN
+    (0x0008, False, False),  # RI_MOUSE_RIGHT_BUTTON_UP
+    (0x0010, False, True),   # RI_MOUSE_MIDDLE_BUTTON_DOWN
+    (0x0020, False, False),  # RI_MOUSE_MIDDLE_BUTTON_UP
+    (0x0040, False, True),   # RI_MOUSE_BUTTON_4_DOWN (X1)
+    (0x0080, False, False),  # RI_MOUSE_BUTTON_4_UP
+    (0x0100, False, True),   # RI_MOUSE_BUTTON_5_DOWN (X2)
+    (0x0200, False, False),  # RI_MOUSE_BUTTON_5_UP
+)
 WM_INPUT = 0x00FF
+WM_QUIT = 0x0012
+# Parent for a message-only window: it is never shown and only receives messages
+HWND_MESSAGE = wintypes.HWND(-3)
+# Records returned by GetRawInputBuffer start on pointer-size boundaries (NEXTRAWINPUTBLOCK)
+RAWINPUT_ALIGN = ctypes.sizeof(ctypes.c_void_p)
+# Size of the reusable buffer raw input records are read into; room for a few hundred mouse packets
+RAW_INPUT_BUFFER_SIZE = 16 * 1024
 
 SUBCLASSPROC = ctypes.WINFUNCTYPE(c_longlong, wintypes.HWND, wintypes.UINT, wintypes.WPARAM, wintypes.LPARAM, wintypes.WPARAM, wintypes.WPARAM)
 
@@ -61,89 +101,482 @@ DefSubclassProc = ctypes.windll.comctl32.DefSubclassProc
 DefSubclassProc.argtypes = [wintypes.HWND, wintypes.UINT, wintypes.WPARAM, wintypes.LPARAM, wintypes.WPARAM, wintypes.WPARAM]
 DefSubclassProc.restype = c_longlong
 
+GetRawInputData = ctypes.windll.user32.GetRawInputData
+GetRawInputData.argtypes = [wintypes.HANDLE, wintypes.UINT, wintypes.LPVOID, ctypes.POINTER(wintypes.UINT), wintypes.UINT]
+GetRawInputData.restype = wintypes.UINT
+
+GetRawInputBuffer = ctypes.windll.user32.GetRawInputBuffer
+GetRawInputBuffer.argtypes = [wintypes.LPVOID, ctypes.POINTER(wintypes.UINT), wintypes.UINT]
+GetRawInputBuffer.restype = wintypes.UINT
+
+CreateWindowExW = ctypes.windll.user32.CreateWindowExW
+CreateWindowExW.argtypes = [wintypes.DWORD, wintypes.LPCWSTR, wintypes.LPCWSTR, wintypes.DWORD, ctypes.c_int, ctypes.c_int,
+                            ctypes.c_int, ctypes.c_int, wintypes.HWND, wintypes.HMENU, wintypes.HINSTANCE, wintypes.LPVOID]
+CreateWindowExW.restype = wintypes.HWND
+
+GetMessageW = ctypes.windll.user32.GetMessageW
+GetMessageW.argtypes = [ctypes.POINTER(wintypes.MSG), wintypes.HWND, wintypes.UINT, wintypes.UINT]
+GetMessageW.restype = wintypes.BOOL
+
+DispatchMessageW = ctypes.windll.user32.DispatchMessageW
+DispatchMessageW.argtypes = [ctypes.POINTER(wintypes.MSG)]
+DispatchMessageW.restype = wintypes.LPARAM
+
+# Settings are stored as JSON; the key=value text file is still read if no JSON file exists yet
+SETTINGS_FILE = "settings.json"
+LEGACY_SETTINGS_FILE = "settings.txt"
+# Settings changes are written this long after the last one, so bursts of updates cost one write
+SETTINGS_SAVE_DELAY_MS = 500
+
+# Upper bounds for the trail point and click buffers, in case of very long line lifespans
+MAX_TRAIL_POINTS = 10000
+MAX_CLICKS = 1000
+
+# Default value of every setting; its type is also the type the setting must have
+DEFAULT_CONFIG: Mapping[str, Any] = types.MappingProxyType({
+    "line_lifespan": 0.66,
+    "frame_interval": 30,
+    "line_width": 20,
+    "line_color": "white",
+    "canvas_bg_color": "black",
+    "left_click_color": "#ff0000",
+    "right_click_color": "#0000ff",
+    "left_click_radius": 15,
+    "right_click_radius": 15,
+    "left_click_release_color": "#ff8080",
+    "right_click_release_color": "light sky blue",
+    "left_click_release_radius": 10,
+    "right_click_release_radius": 10,
+    "coordinate_multiplier": 1.0,
+    "min_sample_interval": 0.002,
+    "line_style": "smooth_fade",
+    "render_mode": "canvas",
+    "cursor_image_path": "",
+    "cursor_image_enabled": False,
+    "cursor_scale": 1.0,
+    "cursor_alignment": "Center",
+    "left_click_image_path": "",
+    "click_images_enabled": False,
+    "left_click_image_scale": 1.0,
+    "left_click_release_image_path": "",
+    "left_click_release_image_scale": 1.0,
+    "right_click_image_path": "",
+    "right_click_image_scale": 1.0,
+    "right_click_release_image_path": "",
+    "right_click_release_image_scale": 1.0,
+    "auto_recenter_enabled": False,
+    "recenter_timeout_seconds": 10.0,
+    "cursor_on_top": False,
+    "window_width": 800,
+    "window_height": 600,
+    "window_x": None,
+    "window_y": None
+})
+
+# Choices offered for the dropdown settings
+LINE_STYLES = ("original", "jagged", "smooth_fade", "jagged_fade")
+RENDER_MODES = ("canvas", "image")
+CURSOR_ALIGNMENTS = ("Center", "Top-Left", "Top-Right", "Bottom-Left", "Bottom-Right")
+# Settings edited with a dropdown, and settings edited with the color chooser
+SETTING_CHOICES = {"line_style": LINE_STYLES, "render_mode": RENDER_MODES}
+COLOR_SETTINGS = frozenset(key for key in DEFAULT_CONFIG if "color" in key)
+
 # --- Application Components ---
 
 class SettingsManager:
     """Handles loading, saving, and managing application settings."""
-    def __init__(self, default_config: Dict[str, Any]):
-        self.config = default_config
+
+    # Converts a value read from the legacy settings.txt, keyed by the type of the setting's default
+    _PARSERS: Dict[type, Callable[[str], Any]] = {
+        bool: lambda value: value.lower() == 'true',
+        float: float,
+        int: int,
+        str: str,
+        # window_x/window_y default to None until the window position is first saved
+        type(None): lambda value: None if value == 'None' else int(value),
+    }
+
+    # JSON value types accepted from settings.json, keyed by the type of the setting's default.
+    # Compared by exact type, so that true/false is never taken for a number.
+    _JSON_TYPES: Dict[type, Tuple[type, ...]] = {
+        bool: (bool,),
+        float: (float, int),
+        int: (int,),
+        str: (str,),
+        type(None): (int, type(None)),
+    }
+
+    def __init__(self, default_config: Mapping[str, Any], root: tk.Misc):
+        # A copy, so the module-level defaults are never modified
+        self.config: Dict[str, Any] = dict(default_config)
+        # The type of each setting, taken from its default
+        self.key_types: Dict[str, type] = {key: type(value) for key, value in default_config.items()}
+        # Used to schedule the deferred save
+        self.root = root
+        self._save_job = None
+        # The configuration as last read from or written to settings.json, None if that file is not current
+        self._saved_config: Dict[str, Any] | None = None
         self._load_settings()
 
     def _load_settings(self) -> None:
-        """Loads settings from a text file if it exists, with robust error handling."""
+        """Loads settings from the JSON settings file, or from the legacy text file if only that exists."""
+        if os.path.exists(SETTINGS_FILE):
+            self._load_json_settings()
+        elif os.path.exists(LEGACY_SETTINGS_FILE):
+            self._load_legacy_settings()
+
+    def _load_json_settings(self) -> None:
+        """Loads settings from settings.json, with robust error handling."""
         try:
-            if not os.path.exists("settings.txt"):
-                return
-            
-            with open("settings.txt", "r") as f:
-                for line in f:
-                    try:
-                        key, value = line.strip().split("=", 1)
-                        if key in self.config:
-                            default_type = type(self.config[key])
-                            if default_type is bool:
-                                self.config[key] = value.lower() == 'true'
-                            elif default_type is float:
-                                self.config[key] = float(value)
-                            elif default_type is int:
-                                self.config[key] = int(value)
-                            else:
-                                self.config[key] = value
-                    except (ValueError, IndexError):
-                        print(f"Skipping malformed line in settings.txt: {line.strip()}")
+            with open(SETTINGS_FILE, "r") as f:
+                data = json.load(f)
+
+            updates = {}
+            for key, value in data.items():
+                accepted = self._JSON_TYPES.get(self.key_types.get(key))
+                if accepted is None:
+                    continue
+                if type(value) in accepted:
+                    updates[key] = value
+                else:
+                    print(f"Ignoring invalid value for '{key}' in {SETTINGS_FILE}: {value!r}")
+            self.config.update(updates)
+            self._saved_config = dict(self.config)
         except Exception as e:
-            print(f"Failed to load settings from 'settings.txt'. Using default configuration. Error: {e}")
+            print(f"Failed to load settings from '{SETTINGS_FILE}'. Using default configuration. Error: {e}")
+
+    def _load_legacy_settings(self) -> None:
+        """Loads settings from the old key=value settings.txt, with robust error handling."""
+        try:
+            with open(LEGACY_SETTINGS_FILE, "r") as f:
+                lines = f.read().splitlines()
+
+            updates = {}
+            for line in lines:
+                try:
+                    key, value = line.strip().split("=", 1)
+                    parser = self._PARSERS.get(self.key_types.get(key))
+                    if parser is not None:
+                        updates[key] = parser(value)
+                except (ValueError, IndexError):
+                    print(f"Skipping malformed line in {LEGACY_SETTINGS_FILE}: {line.strip()}")
+            self.config.update(updates)
+        except Exception as e:
+            print(f"Failed to load settings from '{LEGACY_SETTINGS_FILE}'. Using default configuration. Error: {e}")
             # The self.config is already initialized with defaults, so no action needed.
+        else:
+            # Write settings.json straight away so the text file is only ever parsed once
+            try:
+                self.save_settings()
+            except OSError as e:
+                print(f"Failed to save settings to '{SETTINGS_FILE}'. Error: {e}")
 
     def save_settings(self) -> None:
-        """Saves current settings to a text file."""
-        with open("settings.txt", "w") as f:
-            for key, value in self.config.items():
-                f.write(f"{key}={value}\n")
+        """Saves current settings to the JSON settings file."""
+        # Write to a temporary file first so an interrupted save never leaves a truncated settings file
+        temp_file = SETTINGS_FILE + ".tmp"
+        with open(temp_file, "w") as f:
+            json.dump(self.config, f, indent=4)
+        os.replace(temp_file, SETTINGS_FILE)
+        self._saved_config = dict(self.config)
 
     def update_config(self, new_config: Dict[str, Any]) -> None:
-        """Updates the configuration and saves the changes."""
+        """Updates the configuration and schedules a save if anything changed."""
         self.config.update(new_config)
-        self.save_settings()
+        if self._save_job is None and self.config != self._saved_config:
+            self._save_job = self.root.after(SETTINGS_SAVE_DELAY_MS, self.flush)
+
+    def flush(self) -> None:
+        """Writes any unsaved changes right away, e.g. before the application exits."""
+        if self._save_job is not None:
+            self.root.after_cancel(self._save_job)
+            self._save_job = None
+        if self.config != self._saved_config:
+            self.save_settings()
 
 class MouseEventHandler:
     """Manages mouse movement and click events."""
     def __init__(self, settings_manager: SettingsManager):
         self.settings = settings_manager
-        # List of (x, y, timestamp) for mouse trail
-        self.points: List[Tuple[float, float, float]] = []
-        # List of (rel_x, rel_y, button, timestamp, pressed) for clicks
-        self.clicks: List[Tuple[float, float, str, float, bool]] = []
+        # Timestamps are time.perf_counter_ns() readings, so ages are plain integer subtractions.
+        # Mouse trail as a run of line segments, oldest first, each holding (x, y, timestamp)
+        # points. A recenter starts a new segment, so the trail is never joined across it.
+        self.segments: Deque[Deque[Tuple[float, float, int]]] = collections.deque(
+            [collections.deque(maxlen=MAX_TRAIL_POINTS)])
+        # (rel_x, rel_y, timestamp, kind) for clicks, oldest first. kind is is_left << 1 | pressed, the
+        # index into the UI's per-kind click styles and pools.
+        self.clicks: Deque[Tuple[float, float, int, int]] = collections.deque(maxlen=MAX_CLICKS)
         # Current relative position from the canvas center
         self.current_pos: List[float] = [0, 0]
         # Timestamp of the last mouse movement
-        self.last_movement_time: float = time.time()
+        self.last_movement_time: int = time.perf_counter_ns()
+        # Timestamp of the last recorded trail point, used to throttle high-polling-rate mice
+        self._last_sample_time: int = 0
+        # Timestamp of the movement the trail has not caught up with yet, None if the trail ends at the cursor
+        self._held_sample_time: int | None = None
+        self.refresh_settings()
+        # The raw input thread only appends to these queues and the UI thread only pops from them, so
+        # each is a single-producer/single-consumer channel and the buffers above stay owned by the UI thread.
+        # (dx, dy, timestamp) deltas. Not bounded: dropping deltas would shift every later position.
+        self.pending_moves: Deque[Tuple[int, int, int]] = collections.deque()
+        # (is_left, pressed, timestamp) button presses and releases
+        self.pending_clicks: Deque[Tuple[bool, bool, int]] = collections.deque(maxlen=MAX_CLICKS)
+        # Called on the raw input thread after every input event, so the UI can wake up and drain the queues
+        self.on_input: Callable[[], None] | None = None
+
+    def refresh_settings(self) -> None:
+        """Copies the settings used for every batch of input into attributes; call again after they change."""
+        self._multiplier = self.settings.config["coordinate_multiplier"]
+        self._min_sample_interval_ns = self.settings.config["min_sample_interval"] * 1e9
 
     def on_delta_move(self, dx: int, dy: int) -> None:
-        """Handles a change in mouse position using Raw Input deltas."""
-        now = time.time()
+        """Queues a change in mouse position from Raw Input; called on the raw input thread."""
+        now = time.perf_counter_ns()
         self.last_movement_time = now
-        multiplier = self.settings.config["coordinate_multiplier"]
-        self.current_pos[0] += dx * multiplier
-        self.current_pos[1] += dy * multiplier
-        self.points.append((self.current_pos[0], self.current_pos[1], now))
-
-    def on_click(self, x: int, y: int, button: Any, pressed: bool) -> None:
-        """Handles a mouse button click or release event using pynput."""
-        self.last_movement_time = time.time()
-        button_name = str(button).split('.')[-1]
-        rel_x, rel_y = self.current_pos
-        self.clicks.append((rel_x, rel_y, button_name, time.time(), pressed))
+        self.pending_moves.append((dx, dy, now))
+        if self.on_input:
+            self.on_input()
+
+    def apply_pending_input(self) -> bool:
+        """
+        Applies the queued deltas and clicks in the order they happened; called on the UI thread
+        before drawing, so each click lands where the cursor was at the time. Returns whether the position, trail or clicks changed.
+
+        All the movement since the previous frame becomes a single trail point. update_canvas runs at
+        most once per frame_interval (see MouseTrackerUI.request_redraw), so the trail holds at most
+        lifespan / max(frame_interval, min_sample_interval) points, whatever the mouse's polling rate.
+        """
+        moves = self.pending_moves
+        pending_clicks = self.pending_clicks
+        applied = bool(moves or pending_clicks)
+        if not applied and self._held_sample_time is None:
+            return False
+        pos = self.current_pos
+        if applied:
+            multiplier = self._multiplier
+            last_move_time = None
+            while moves or pending_clicks:
+                if pending_clicks and (not moves or pending_clicks[0][2] < moves[0][2]):
+                    is_left, pressed, click_time = pending_clicks.popleft()
+                    self.clicks.append((pos[0], pos[1], click_time, is_left << 1 | pressed))
+                else:
+                    dx, dy, last_move_time = moves.popleft()
+                    pos[0] += dx * multiplier
+                    pos[1] += dy * multiplier
+            if last_move_time is not None:
+                self._held_sample_time = last_move_time
+        # Only record the point if the previous one is old enough. Otherwise it is held back and recorded
+        # by a later call, even once the mouse has stopped, so the trail still ends at the cursor.
+        now = time.perf_counter_ns()
+        if self._held_sample_time is not None and now - self._last_sample_time >= self._min_sample_interval_ns:
+            self._last_sample_time = now
+            self.segments[-1].append((pos[0], pos[1], self._held_sample_time))
+            self._held_sample_time = None
+            applied = True
+        return applied
+
+    def next_sample_time(self) -> int | None:
+        """Returns when a held-back trail point can be recorded, or None if there is none."""
+        if self._held_sample_time is None:
+            return None
+        return self._last_sample_time + int(self._min_sample_interval_ns)
+
+    def recenter(self) -> None:
+        """Moves the tracked position back to the canvas center, breaking the trail line."""
+        self.current_pos = [0, 0]
+        # The held-back point belongs to the old position
+        self._held_sample_time = None
+        if self.segments[-1]:
+            self.segments.append(collections.deque(maxlen=MAX_TRAIL_POINTS))
+
+    def on_click(self, is_left: bool, pressed: bool) -> None:
+        """Queues a mouse button press or release from Raw Input; called on the raw input thread."""
+        now = time.perf_counter_ns()
+        self.last_movement_time = now
+        self.pending_clicks.append((is_left, pressed, now))
+        if self.on_input:
+            self.on_input()
+
+class CanvasItemPool:
+    """
+    Recycles canvas items of one type across frames instead of deleting and recreating them.
+    Canvas commands are sent with tk.call directly, skipping Tkinter's per-call option processing.
+    """
+    def __init__(self, canvas: tk.Canvas, item_type: str, tag: str):
+        self.canvas = canvas
+        self.item_type = item_type
+        self.tag = tag
+        self._call = canvas.tk.call
+        self._path = str(canvas)
+        self.items: List[int] = []
+        # Coords and options last applied to each item, so only what changed is sent to Tk
+        self._item_coords: List[Sequence[float]] = []
+        self._item_options: List[Dict[str, Any]] = []
+        # Items handed out so far this frame, and items left visible by the previous frame
+        self._used = 0
+        self._visible = 0
+        # Whether a new item had to be created this frame (new items land on top of the stack)
+        self.created = False
+
+    def begin_frame(self) -> None:
+        """Makes every pooled item available for reuse."""
+        self._used = 0
+        self.created = False
+
+    def acquire(self, coords: Sequence[float], **options: Any) -> int:
+        """Returns an item moved to coords with the given options, creating one only when the pool is exhausted."""
+        if self._used < len(self.items):
+            item = self.items[self._used]
+            if coords != self._item_coords[self._used]:
+                self._call(self._path, "coords", item, *coords)
+                self._item_coords[self._used] = coords
+            if self._used >= self._visible or options != self._item_options[self._used]:
+                self._call(self._path, "itemconfigure", item, "-state", tk.NORMAL, *self._flatten(options))
+                self._item_options[self._used] = options
+        else:
+            item = self.canvas.tk.getint(self._call(self._path, "create", self.item_type, *coords,
+                                                    "-tags", self.tag, *self._flatten(options)))
+            self.items.append(item)
+            self._item_coords.append(coords)
+            self._item_options.append(options)
+            self.created = True
+        self._used += 1
+        return item
+
+    @staticmethod
+    def _flatten(options: Dict[str, Any]) -> List[Any]:
+        """Turns keyword options into the -option value pairs Tk expects."""
+        return [part for key, value in options.items() for part in ("-" + key, value)]
+
+    def end_frame(self) -> None:
+        """Hides the items that were visible last frame but went unused this frame."""
+        if self._used == 0 and self._visible > 1:
+            # Nothing left to show: hide the whole pool through its tag in a single call
+            self._call(self._path, "itemconfigure", self.tag, "-state", tk.HIDDEN)
+        else:
+            for item in self.items[self._used:self._visible]:
+                self._call(self._path, "itemconfigure", item, "-state", tk.HIDDEN)
+        self._visible = self._used
+
+    def clear(self) -> None:
+        """Deletes every pooled item, for when the pool will not be used for a while."""
+        self.canvas.delete(self.tag)
+        self.items.clear()
+        self._item_coords.clear()
+        self._item_options.clear()
+        self._used = self._visible = 0
+
+class TrailRaster:
+    """
+    Draws the trail into an offscreen PIL image shown as a single canvas image item.
+    Used by the "image" render mode, where each frame costs one image upload regardless of trail length.
+    """
+    def __init__(self, canvas: tk.Canvas):
+        self.canvas = canvas
+        self.image: PIL.Image.Image | None = None
+        self.draw: PIL.ImageDraw.ImageDraw | None = None
+        # Reference to the uploaded frame to prevent garbage collection
+        self.photo: PIL.ImageTk.PhotoImage | None = None
+        self.item = canvas.create_image(0, 0, anchor=tk.NW, state=tk.HIDDEN, tags=("frame",))
+        self._rgb_cache: Dict[str, Tuple[int, int, int]] = {}
+        # Whether anything was drawn since begin_frame
+        self._drawn = False
+
+    def rgb(self, color: str) -> Tuple[int, int, int]:
+        """Converts any Tk color name to the 8-bit RGB tuple PIL expects."""
+        rgb = self._rgb_cache.get(color)
+        if rgb is None:
+            r, g, b = self.canvas.winfo_rgb(color)
+            rgb = self._rgb_cache[color] = (r >> 8, g >> 8, b >> 8)
+        return rgb
+
+    def begin_frame(self, width: int, height: int, bg_color: str) -> None:
+        """Clears the offscreen image to the background color, reallocating it when the canvas was resized."""
+        width, height = max(1, width), max(1, height)
+        if self.image is None or self.image.size != (width, height):
+            self.image = PIL.Image.new("RGB", (width, height), self.rgb(bg_color))
+            self.draw = PIL.ImageDraw.Draw(self.image)
+        else:
+            self.image.paste(self.rgb(bg_color), (0, 0, width, height))
+        self._drawn = False
+
+    def line(self, coords: Sequence[float], color: str, width: float, smooth: bool = False) -> None:
+        """Draws one trail segment or polyline into the offscreen image, as a spline if smooth is set."""
+        if smooth and len(coords) >= 6:
+            # Curved joints avoid notches between the many short pieces of the spline
+            self.draw.line(self._spline(coords), fill=self.rgb(color), width=round(width), joint="curve")
+        else:
+            self.draw.line(coords, fill=self.rgb(color), width=round(width))
+        self._drawn = True
+
+    # (start, control, end) weights of the points on each quadratic spline piece, 12 per piece as for
+    # the canvas's default -splinesteps
+    _SPLINE_WEIGHTS = tuple(((1 - t) ** 2, 2 * t * (1 - t), t * t) for t in [i / 12 for i in range(1, 13)])
+
+    @classmethod
+    def _spline(cls, coords: Sequence[float]) -> List[float]:
+        """
+        Expands a polyline into points along the curve Tk draws for a smooth=True line: a quadratic
+        spline from midpoint to midpoint of the segments, using each vertex as the control point.
+        """
+        last = len(coords) // 2 - 1
+        points = [coords[0], coords[1]]
+        ax, ay = coords[0], coords[1]
+        for i in range(1, last):
+            cx, cy = coords[2 * i], coords[2 * i + 1]
+            if i == last - 1:
+                # The final piece ends on the polyline's end point instead of a midpoint
+                bx, by = coords[-2], coords[-1]
+            else:
+                bx, by = (cx + coords[2 * i + 2]) / 2, (cy + coords[2 * i + 3]) / 2
+            for wa, wc, wb in cls._SPLINE_WEIGHTS:
+                points.append(wa * ax + wc * cx + wb * bx)
+                points.append(wa * ay + wc * cy + wb * by)
+            ax, ay = bx, by
+        return points
+
+    def end_frame(self) -> None:
+        """Uploads the finished frame to the canvas, or just hides the item if the frame is empty."""
+        if not self._drawn:
+            self.canvas.itemconfigure(self.item, state=tk.HIDDEN)
+            return
+        if self.photo is None or (self.photo.width(), self.photo.height()) != self.image.size:
+            self.photo = PIL.ImageTk.PhotoImage(self.image)
+            self.canvas.itemconfigure(self.item, image=self.photo, state=tk.NORMAL)
+        else:
+            # Same size as last frame, so the existing Tk image is refreshed in place instead of reallocated
+            self.photo.paste(self.image)
+            self.canvas.itemconfigure(self.item, state=tk.NORMAL)
+
+    def hide(self) -> None:
+        """Hides the image item and frees the buffers while another render mode is active."""
+        if self.image is not None:
+            self.canvas.itemconfigure(self.item, state=tk.HIDDEN)
+            self.image = self.draw = self.photo = None
 
 class MouseTrackerUI:
     """Manages the main GUI and canvas rendering."""
+
+    # Map of cursor_alignment values to the Tk anchor of the cursor image
+    ANCHOR_MAP = {
+        "Center": tk.CENTER,
+        "Top-Left": tk.NW,
+        "Top-Right": tk.NE,
+        "Bottom-Left": tk.SW,
+        "Bottom-Right": tk.SE
+    }
+
     def __init__(self, root: tk.Tk, settings_manager: SettingsManager, event_handler: MouseEventHandler):
         self.root = root
         self.settings = settings_manager
         self.events = event_handler
         self.settings_window = None
+        # Tk variable class for each setting, worked out the first time the settings panel opens
+        self._settings_var_types = None
+        # Tk variables of the settings panel, kept between openings so reopening it creates no new ones
+        self._settings_vars: Dict[str, tk.Variable] = {}
         self._new_wndproc_ptr = None
-        self.pynput_listener = None
+        self._raw_input_thread_id = None
         
         # Image references to prevent garbage collection
         self.cursor_photo_image = None
@@ -151,20 +584,35 @@ class MouseTrackerUI:
         self.left_click_release_photo_image = None
         self.right_click_photo_image = None
         self.right_click_release_photo_image = None
+        # Loaded images keyed by (path, mtime, scale); _update_images keeps only the ones still in use
+        self._image_cache: Dict[Tuple[str, int, float], PIL.ImageTk.PhotoImage | None] = {}
+        self._previous_image_cache: Dict[Tuple[str, int, float], PIL.ImageTk.PhotoImage | None] = {}
+        # Decoded full-size images keyed by (path, mtime), so a scale change only resizes
+        self._decoded_images: Dict[Tuple[str, int], PIL.Image.Image] = {}
         
         self.cursor_image_id = None
+        # (image, anchor) the cursor item currently shows, None while it is hidden
+        self._cursor_item_style = None
+        # (count, newest timestamp) of the clicks last stacked by _draw_clicks, None to restack next frame
+        self._click_stack_key = None
+        # Redraws only run while something is on screen or input arrives; see request_redraw
+        self._redraw_job = None
+        # Timer that requests a redraw when something next expires or the recenter timeout runs out
+        self._wake_job = None
+        self._had_content_last_frame = False
+        # Set whenever something other than the passage of time changes what should be on screen
+        self._dirty = True
+        # perf_counter_ns() at the start of the last update_canvas, which request_redraw paces against
+        self._last_frame_time = 0
+        # Set by the raw input thread when it asks the main loop to wake up, cleared by update_canvas just
+        # before it drains the input queues; see _notify_input
+        self._input_wake_pending = False
+        self.events.on_input = self._notify_input
+        self._cache_frame_settings()
         self._setup_main_window()
         self._setup_bindings()
         self._register_raw_input()
-        self._start_pynput_listener()
         self._update_images()
-        self.anchor_map = {
-            "Center": tk.CENTER,
-            "Top-Left": tk.NW,
-            "Top-Right": tk.NE,
-            "Bottom-Left": tk.SW,
-            "Bottom-Right": tk.SE
-        }
 
     def _setup_main_window(self) -> None:
         """Initializes the main application window and canvas."""
@@ -182,6 +630,19 @@ class MouseTrackerUI:
 
         self.canvas = tk.Canvas(self.root, bg=self.settings.config["canvas_bg_color"])
         self.canvas.pack(fill="both", expand=True)
+        # The canvas size only changes on <Configure>; update_canvas reads these instead of querying Tk
+        self.canvas.update_idletasks()
+        self._canvas_width = self.canvas.winfo_width()
+        self._canvas_height = self.canvas.winfo_height()
+
+        # Canvas items are reused between frames; see CanvasItemPool
+        self._trail_pool = CanvasItemPool(self.canvas, "line", "trail")
+        # One pool per click kind (indexed like the click styles), so each pool's items keep a fixed
+        # style and reusing them only needs a coords update
+        self._click_oval_pools = [CanvasItemPool(self.canvas, "oval", f"click_oval_{kind}") for kind in range(4)]
+        self._click_image_pools = [CanvasItemPool(self.canvas, "image", f"click_image_{kind}") for kind in range(4)]
+        self._pools = [self._trail_pool, *self._click_oval_pools, *self._click_image_pools]
+        self._trail_raster = TrailRaster(self.canvas)
         
         self.settings_button = Button(self.root, text="Settings", command=self.open_settings)
         self.settings_button.place_forget()
@@ -191,6 +652,12 @@ class MouseTrackerUI:
         self.root.protocol("WM_DELETE_WINDOW", self.close)
         self.root.bind("<Enter>", self._show_settings_button)
         self.root.bind("<Leave>", self._hide_settings_button)
+        self.canvas.bind("<Configure>", self._on_canvas_resize)
+
+    def _on_canvas_resize(self, event: Any) -> None:
+        """Caches the new canvas size and redraws around the new center."""
+        self._canvas_width, self._canvas_height = event.width, event.height
+        self.request_redraw()
 
     def _show_settings_button(self, event: Any = None) -> None:
         """Makes the settings button visible."""
@@ -201,70 +668,169 @@ class MouseTrackerUI:
         self.settings_button.place_forget()
 
     def _new_wndproc(self, hwnd: int, msg: int, wParam: int, lParam: int, uIdSubclass: int, dwRefData: int) -> int:
-        """Subclass procedure to handle Raw Input messages for movement."""
+        """Subclass procedure of the message-only window; handles Raw Input messages for movement and buttons."""
         if msg == WM_INPUT:
             self._process_raw_input(lParam)
         return DefSubclassProc(hwnd, msg, wParam, lParam, uIdSubclass, dwRefData)
 
     def _register_raw_input(self) -> None:
-        """Registers the application to receive Raw Input for movement tracking."""
-        hwnd = self.root.winfo_id()
-        rid = RAWINPUTDEVICE(usUsagePage=HID_USAGE_PAGE_GENERIC, usUsage=HID_USAGE_GENERIC_MOUSE, dwFlags=RIDEV_INPUTSINK, hwndTarget=hwnd)
-        ctypes.windll.user32.RegisterRawInputDevices(ctypes.byref(rid), 1, ctypes.sizeof(rid))
+        """Starts the thread that receives Raw Input for mouse movement and button changes."""
+        # Reused for every read so high-polling-rate mice don't allocate a buffer per packet
+        self._raw_input_buffer = ctypes.create_string_buffer(RAW_INPUT_BUFFER_SIZE)
+        # Views onto the buffer, created once: the record GetRawInputData fills in, and its size argument
+        self._raw_input = RAWINPUT.from_buffer(self._raw_input_buffer)
+        self._raw_input_size = wintypes.UINT()
+        # Movement read so far in the current batch, not yet passed to on_delta_move
+        self._batch_dx = self._batch_dy = 0
         self._new_wndproc_ptr = SUBCLASSPROC(self._new_wndproc)
+        threading.Thread(target=self._raw_input_loop, daemon=True).start()
+
+    def _raw_input_loop(self) -> None:
+        """
+        Owns a message-only window that Raw Input is delivered to and blocks on its message queue,
+        so mouse packets are read as soon as they arrive instead of waiting behind Tk's own events.
+        """
+        user32 = ctypes.windll.user32
+        self._raw_input_thread_id = ctypes.windll.kernel32.GetCurrentThreadId()
+        hwnd = CreateWindowExW(0, "STATIC", None, 0, 0, 0, 0, 0, HWND_MESSAGE, None, None, None)
         ctypes.windll.comctl32.SetWindowSubclass(hwnd, self._new_wndproc_ptr, 1, 0)
+        # RIDEV_INPUTSINK alone: input arrives while the app is in the background, and legacy mouse
+        # messages keep flowing. RIDEV_NOLEGACY would stop WM_MOUSEMOVE and button messages for the whole
+        # process, including the Tk windows, and a message-only window never sees legacy messages anyway.
+        # RIDEV_DEVNOTIFY is left off, since device arrival and removal don't matter here.
+        rid = RAWINPUTDEVICE(usUsagePage=HID_USAGE_PAGE_GENERIC, usUsage=HID_USAGE_GENERIC_MOUSE, dwFlags=RIDEV_INPUTSINK, hwndTarget=hwnd)
+        user32.RegisterRawInputDevices(ctypes.byref(rid), 1, ctypes.sizeof(rid))
+
+        msg = wintypes.MSG()
+        while GetMessageW(ctypes.byref(msg), None, 0, 0) > 0:
+            user32.TranslateMessage(ctypes.byref(msg))
+            DispatchMessageW(ctypes.byref(msg))
+
+        ctypes.windll.comctl32.RemoveWindowSubclass(hwnd, self._new_wndproc_ptr, 1)
+        user32.DestroyWindow(hwnd)
 
     def _process_raw_input(self, hRawInput: int) -> None:
-        """Processes Raw Input data to get mouse movement deltas."""
-        size = wintypes.UINT()
-        ctypes.windll.user32.GetRawInputData(hRawInput, 0x10000003, None, ctypes.byref(size), ctypes.sizeof(RAWINPUTHEADER))
-        
-        if size.value > 0:
-            buf = ctypes.create_string_buffer(size.value)
-            ctypes.windll.user32.GetRawInputData(hRawInput, 0x10000003, buf, ctypes.byref(size), ctypes.sizeof(RAWINPUTHEADER))
-            
-            raw = ctypes.cast(buf, ctypes.POINTER(RAWINPUT)).contents
-            if raw.header.dwType == 0:  # RIM_TYPEMOUSE
-                mouse_data = raw.data.mouse
-                if mouse_data.lLastX != 0 or mouse_data.lLastY != 0:
-                    self.events.on_delta_move(mouse_data.lLastX, mouse_data.lLastY)
+        """Processes Raw Input data to get mouse movement deltas and button changes.
 
-    def _start_pynput_listener(self) -> None:
-        """Starts the pynput listener in a separate thread for click detection."""
-        self.pynput_listener = pynput_mouse.Listener(on_click=self.events.on_click)
-        self.pynput_listener.start()
+        Reads the packet for this WM_INPUT message, then drains whatever else is already queued
+        with GetRawInputBuffer. Movement is summed and reported as one delta per batch, except
+        that a button change reports the movement before it first, so clicks stay in order.
+        """
+        buf = self._raw_input_buffer
+        size = self._raw_input_size
+        header_size = ctypes.sizeof(RAWINPUTHEADER)
+
+        size.value = len(buf)
+        if GetRawInputData(hRawInput, RID_INPUT, buf, ctypes.byref(size), header_size) not in (0, 0xFFFFFFFF):
+            raw = self._raw_input
+            if raw.header.dwType == RIM_TYPEMOUSE:
+                self._handle_raw_mouse(raw.data.mouse)
+
+        while True:
+            size.value = len(buf)
+            count = GetRawInputBuffer(buf, ctypes.byref(size), header_size)
+            if count == 0 or count == 0xFFFFFFFF:
+                break
+            offset = 0
+            for _ in range(count):
+                raw = RAWINPUT.from_buffer(buf, offset)
+                if raw.header.dwType == RIM_TYPEMOUSE:
+                    self._handle_raw_mouse(raw.data.mouse)
+                offset += (raw.header.dwSize + RAWINPUT_ALIGN - 1) & ~(RAWINPUT_ALIGN - 1)
+
+        self._flush_raw_movement()
+
+    def _handle_raw_mouse(self, mouse: RAWMOUSE) -> None:
+        """Adds one mouse packet's movement to the batch and reports its button changes."""
+        self._batch_dx += mouse.lLastX
+        self._batch_dy += mouse.lLastY
+        button_flags = mouse.usButtonFlags
+        if button_flags:
+            self._flush_raw_movement()
+            for flag, is_left, pressed in RAW_BUTTON_EVENTS:
+                if button_flags & flag:
+                    self.events.on_click(is_left, pressed)
+
+    def _flush_raw_movement(self) -> None:
+        """Reports the movement summed so far in this batch, if there is any."""
+        if self._batch_dx != 0 or self._batch_dy != 0:
+            self.events.on_delta_move(self._batch_dx, self._batch_dy)
+            self._batch_dx = self._batch_dy = 0
 
     def open_settings(self) -> None:
         """Opens the settings panel window."""
         if self.settings_window and self.settings_window.winfo_exists():
             self.settings_window.lift()
             return
-        self.settings_window = SettingsPanel(self.root, self.settings.config, self.apply_settings).get_toplevel_window()
+        if self._settings_var_types is None:
+            self._settings_var_types = SettingsPanel.var_types_for(self.settings.key_types)
+        self.settings_window = SettingsPanel(self.root, self.settings.config, self._settings_var_types, self._settings_vars,
+                                             self.apply_settings).get_toplevel_window()
 
     def apply_settings(self, new_config: Dict[str, Any]) -> None:
         """Applies new settings to the application."""
         self.settings.update_config(new_config)
+        self.events.refresh_settings()
+        self._cache_frame_settings()
         self.canvas.config(bg=self.settings.config["canvas_bg_color"])
         self._update_images()
+        self._restack_items()
+        self.request_redraw()
+
+    def _cache_frame_settings(self) -> None:
+        """Copies the settings used by every frame into attributes, in the units the renderer works in."""
+        cfg = self.settings.config
+        self._lifespan_ns = int(cfg["line_lifespan"] * 1e9)
+        self._frame_interval = cfg["frame_interval"]
+        self._line_width = cfg["line_width"]
+        self._line_style = cfg["line_style"]
+        self._line_color = cfg["line_color"]
+        self._render_to_image = cfg["render_mode"] == "image"
+        self._canvas_bg_color = cfg["canvas_bg_color"]
+        self._auto_recenter_enabled = cfg["auto_recenter_enabled"]
+        self._recenter_timeout_ns = int(cfg["recenter_timeout_seconds"] * 1e9)
+        self._cursor_anchor = self.ANCHOR_MAP.get(cfg["cursor_alignment"], tk.CENTER)
+        # Per-kind click styles, indexed by is_left << 1 | pressed; _update_images pairs them with the images
+        self._click_colors = (cfg["right_click_release_color"], cfg["right_click_color"],
+                              cfg["left_click_release_color"], cfg["left_click_color"])
+        self._click_radii = (cfg["right_click_release_radius"], cfg["right_click_radius"],
+                             cfg["left_click_release_radius"], cfg["left_click_radius"])
 
     def _load_and_resize_image(self, path: str, scale: float) -> PIL.ImageTk.PhotoImage | None:
-        """Helper to load and resize an image from a given path."""
-        if path and os.path.exists(path):
+        """Helper to load and resize an image from a given path, reusing the last load while the file is unchanged."""
+        if not path:
+            return None
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+        key = (path, mtime, scale)
+        if key in self._image_cache:
+            return self._image_cache[key]
+        if key in self._previous_image_cache:
+            photo = self._previous_image_cache[key]
+        else:
+            photo = None
             try:
-                original_image = PIL.Image.open(path).convert("RGBA")
+                original_image = self._decoded_images.get((path, mtime))
+                if original_image is None:
+                    original_image = self._decoded_images[path, mtime] = PIL.Image.open(path).convert("RGBA")
                 if scale != 1.0:
                     new_size = (int(original_image.width * scale), int(original_image.height * scale))
                     resized_image = original_image.resize(new_size, PIL.Image.Resampling.LANCZOS)
                 else:
                     resized_image = original_image
-                return PIL.ImageTk.PhotoImage(resized_image)
+                photo = PIL.ImageTk.PhotoImage(resized_image)
             except Exception as e:
+                # Cached as well, so a broken file is reported once rather than on every apply
                 print(f"Failed to load image from {path}: {e}")
-                return None
-        return None
+        self._image_cache[key] = photo
+        return photo
 
     def _update_images(self):
         """Loads and resizes all images based on settings."""
+        # Images are only decoded again when their path, file or scale changed
+        self._previous_image_cache, self._image_cache = self._image_cache, {}
         self.cursor_photo_image = self._load_and_resize_image(self.settings.config.get("cursor_image_path"), self.settings.config.get("cursor_scale", 1.0)) if self.settings.config.get("cursor_image_enabled", False) else None
         
         if self.settings.config.get("click_images_enabled", False):
@@ -278,14 +844,21 @@ class MouseTrackerUI:
             self.right_click_photo_image = None
             self.right_click_release_photo_image = None
 
+        # (image, color, radius) for each click kind, indexed by is_left << 1 | pressed
+        images = (self.right_click_release_photo_image, self.right_click_photo_image,
+                  self.left_click_release_photo_image, self.left_click_photo_image)
+        self._click_styles = tuple(zip(images, self._click_colors, self._click_radii))
+        # A kind may have moved between the oval and image pools
+        self._click_stack_key = None
+        self._previous_image_cache = {}
+        in_use = {(path, mtime) for path, mtime, _ in self._image_cache}
+        self._decoded_images = {key: image for key, image in self._decoded_images.items() if key in in_use}
+
     def close(self) -> None:
         """Saves window position and closes the application."""
-        if self.root.winfo_exists() and self._new_wndproc_ptr:
-            hwnd = self.root.winfo_id()
-            ctypes.windll.comctl32.RemoveWindowSubclass(hwnd, self._new_wndproc_ptr, 1)
-        
-        if self.pynput_listener and self.pynput_listener.running:
-            self.pynput_listener.stop()
+        if self._raw_input_thread_id:
+            # Ends the raw input thread's message loop; it cleans up its own window
+            ctypes.windll.user32.PostThreadMessageW(self._raw_input_thread_id, WM_QUIT, 0, 0)
 
         current_geometry = self.root.winfo_geometry().split('+')
         width, height = map(int, current_geometry[0].split('x'))
@@ -296,115 +869,278 @@ class MouseTrackerUI:
             "window_x": x_pos,
             "window_y": y_pos
         })
+        self.settings.flush()
         self.root.destroy()
 
+    def _notify_input(self) -> None:
+        """
+        Wakes the main loop after input was queued; called on the raw input thread.
+        Only the first event after a drain schedules anything, and the callback only runs on the UI thread,
+        so _redraw_job and every other Tk call stay on the UI thread. Tkinter forwards the after_idle call
+        to the main loop, which makes this thread wait for it at most once per drain.
+        """
+        if self._input_wake_pending:
+            return
+        self._input_wake_pending = True
+        try:
+            self.root.after_idle(self._on_input_wake)
+        except (RuntimeError, tk.TclError):
+            # The main loop is not running (yet, or any more). The queued input is drained with the next frame.
+            self._input_wake_pending = False
+
+    def _on_input_wake(self) -> None:
+        """Requests a redraw for input queued by the raw input thread, unless a frame already drained it."""
+        if self._input_wake_pending:
+            self.request_redraw()
+
+    def request_redraw(self) -> None:
+        """
+        Schedules a redraw for one frame interval after the previous frame, or for when Tk is next idle if
+        that has already passed, unless one is already pending. UI thread only.
+        Input therefore never redraws faster than frame_interval, however fast it arrives.
+        """
+        self._dirty = True
+        if self._redraw_job is not None:
+            return
+        delay_ms = self._frame_interval - (time.perf_counter_ns() - self._last_frame_time) // 1_000_000
+        try:
+            if delay_ms > 0:
+                self._redraw_job = self.root.after(delay_ms, self.update_canvas)
+            else:
+                self._redraw_job = self.root.after_idle(self.update_canvas)
+        except tk.TclError:
+            # The application is shutting down
+            pass
+
     def update_canvas(self) -> None:
         """Redraws the canvas with current mouse trail and clicks."""
-        self.canvas.delete("all")
-        now = time.time()
+        # Cancelling whatever is still queued keeps at most one redraw chain alive
+        if self._redraw_job is not None:
+            self.root.after_cancel(self._redraw_job)
+            self._redraw_job = None
+        if self._wake_job is not None:
+            self.root.after_cancel(self._wake_job)
+            self._wake_job = None
+        # Changes requested through request_redraw; queued input is checked separately below
+        dirty = self._dirty
+        self._dirty = False
+        # Input is recorded on the input threads and only applied here, on the UI thread. The wake flag is
+        # cleared first, so input queued during the drain wakes the main loop again.
+        self._input_wake_pending = False
+        if self.events.apply_pending_input():
+            dirty = True
+        now = self._last_frame_time = time.perf_counter_ns()
         
         # Auto-recenter logic
-        if self.settings.config["auto_recenter_enabled"] and (now - self.events.last_movement_time) > self.settings.config["recenter_timeout_seconds"]:
-            self.events.current_pos = [0, 0]
-            self.events.points.append(None)
+        if self._auto_recenter_enabled and (now - self.events.last_movement_time) > self._recenter_timeout_ns:
+            self.events.recenter()
             self.events.last_movement_time = now
+            dirty = True
 
-        lifespan = self.settings.config["line_lifespan"]
+        lifespan = self._lifespan_ns
         
-        try:
-            cx, cy = self.canvas.winfo_width() // 2, self.canvas.winfo_height() // 2
-        except tk.TclError:
-            cx, cy = 400, 300
-
-        window_width, window_height = self.canvas.winfo_width(), self.canvas.winfo_height()
+        window_width, window_height = self._canvas_width, self._canvas_height
+        cx, cy = window_width // 2, window_height // 2
 
         if abs(self.events.current_pos[0]) > window_width / 2 or abs(self.events.current_pos[1]) > window_height / 2:
-            self.events.current_pos = [0, 0]
-            self.events.points.append(None)
+            self.events.recenter()
+            dirty = True
+
+        # Both buffers are ordered by time, so expired entries are always at the front.
+        # Segments that have expired entirely are dropped, keeping the newest one to append to.
+        segments = self.events.segments
+        while True:
+            segment = segments[0]
+            while segment and now - segment[0][2] > lifespan:
+                segment.popleft()
+                dirty = True
+            if segment or len(segments) == 1:
+                break
+            segments.popleft()
+        # Only the newest segment can be empty, so the trail is empty exactly when the first one is
+        has_trail = bool(segments[0])
+        clicks = self.events.clicks
+        while clicks and now - clicks[0][2] > lifespan:
+            clicks.popleft()
+            dirty = True
+
+        if not has_trail and not clicks and not self._had_content_last_frame:
+            # The canvas is already empty: only the cursor can have moved
+            self._draw_cursor(cx, cy)
+            self._schedule_next_frame(now, animating=False)
+            return
+        self._had_content_last_frame = bool(has_trail or clicks)
+
+        line_style = self._line_style
+        fades = "fade" in line_style and lifespan > 0
+        animating = fades and has_trail
+        if not dirty and not animating:
+            # Nothing moved, appeared or expired, and nothing is fading: the canvas is already up to date
+            self._schedule_next_frame(now, animating=False)
+            return
 
-        self.events.points = [p for p in self.events.points if p is None or now - p[2] <= lifespan]
-        self.events.clicks = [c for c in self.events.clicks if now - c[3] <= lifespan]
+        for pool in self._pools:
+            pool.begin_frame()
+
+        # Single pass over the live points of each segment: translate to canvas coordinates and work out
+        # each segment's faded width as we go instead of building intermediate lists.
+        base_width = self._line_width
+        if fades:
+            # width = base_width * (1 - (now - t) / lifespan), folded into one multiply-add per point
+            width_per_ns = base_width / lifespan
+            width_offset = base_width - now * width_per_ns
+        raster = self._render_to_image
+        if raster:
+            self._trail_raster.begin_frame(window_width, window_height, self._canvas_bg_color)
+            if self._trail_pool.items:
+                # The segment items from canvas mode are not needed any more
+                self._trail_pool.clear()
+        if not fades:
+            # Every segment has the same width, so each run of the trail is drawn as one polyline.
+            # For "original", Tk smooths the whole run as a spline.
+            smooth = line_style == "original"
+            for segment in segments:
+                coords: List[float] = []
+                for x, y, _ in segment:
+                    x += cx
+                    y += cy
+                    if coords:
+                        dx = x - coords[-2]
+                        dy = y - coords[-1]
+                        if dx * dx + dy * dy < 0.25:
+                            continue
+                    coords.append(x)
+                    coords.append(y)
+                if len(coords) >= 4:
+                    self._draw_trail_run(coords, base_width, smooth)
+        else:
+            # A line has a single width, so a fading run is split wherever its width, rounded to whole
+            # pixels, changes; consecutive segments of the same width share one polyline
+            for segment in segments:
+                run: List[float] = []
+                run_width = None
+                prev_x = prev_y = None
+                prev_width = base_width
+                for x, y, t in segment:
+                    x += cx
+                    y += cy
+                    if prev_x is not None:
+                        dx = x - prev_x
+                        dy = y - prev_y
+                        if dx * dx + dy * dy < 0.25:
+                            # Less than half a pixel: fold this point into the next segment instead
+                            continue
+                        width = round(prev_width)
+                        if width != run_width:
+                            if len(run) >= 4:
+                                self._draw_trail_run(run, run_width)
+                            run = [prev_x, prev_y]
+                            run_width = width
+                        run.append(x)
+                        run.append(y)
+                    prev_x, prev_y = x, y
+                    prev_width = max(0.0, t * width_per_ns + width_offset)
+                if len(run) >= 4:
+                    self._draw_trail_run(run, run_width)
+
+        clicks_restacked = self._draw_clicks(cx, cy)
+        self._draw_cursor(cx, cy)
+
+        for pool in self._pools:
+            pool.end_frame()
+        if raster:
+            self._trail_raster.end_frame()
+        else:
+            self._trail_raster.hide()
+        if clicks_restacked or any(pool.created for pool in self._pools):
+            self._restack_items()
 
-        coords_tuples = [(cx + p[0], cy + p[1]) if p is not None else None for p in self.events.points]
-        
-        for i in range(len(coords_tuples) - 1):
-            p1 = coords_tuples[i]
-            p2 = coords_tuples[i+1]
-            if p1 is not None and p2 is not None:
-                self._draw_line_segment(p1, p2, now, lifespan, self.events.points[i])
+        self._schedule_next_frame(now, animating)
 
-        # Drawing order logic: cursor on top of clicks or vice versa
+    def _draw_trail_run(self, coords: List[float], width: float, smooth: bool = False) -> None:
+        """Draws one polyline of the trail with the active renderer."""
+        if self._render_to_image:
+            self._trail_raster.line(coords, self._line_color, width, smooth)
+        else:
+            self._trail_pool.acquire(coords, fill=self._line_color, width=width, smooth=smooth)
+
+    def _schedule_next_frame(self, now: int, animating: bool) -> None:
+        """
+        Re-arms the frame timer while the trail is fading. Otherwise the canvas only changes on input,
+        which requests its own redraw, so a single timer is set for the next time anything expires
+        or the recenter timeout runs out.
+        """
+        if animating:
+            self._redraw_job = self.root.after(self._frame_interval, self.update_canvas)
+            return
+        wake_times = []
+        segments = self.events.segments
+        if segments[0]:
+            wake_times.append(segments[0][0][2] + self._lifespan_ns)
+        if self.events.clicks:
+            wake_times.append(self.events.clicks[0][2] + self._lifespan_ns)
+        sample_time = self.events.next_sample_time()
+        if sample_time is not None:
+            wake_times.append(sample_time)
+        if self._auto_recenter_enabled and self.events.current_pos != [0, 0]:
+            wake_times.append(self.events.last_movement_time + self._recenter_timeout_ns)
+        if wake_times:
+            remaining_ns = min(wake_times) - now
+            self._wake_job = self.root.after(max(1, remaining_ns // 1_000_000 + 1), self.request_redraw)
+
+    def _restack_items(self) -> None:
+        """Restores the drawing order: trail image and trail at the bottom, cursor above or below the clicks."""
         if self.settings.config["cursor_on_top"]:
-            self._draw_clicks(cx, cy)
-            self._draw_cursor(cx, cy)
+            self.canvas.tag_raise("cursor")
         else:
-            self._draw_cursor(cx, cy)
-            self._draw_clicks(cx, cy)
-        
-        self.root.after(self.settings.config["frame_interval"], self.update_canvas)
+            self.canvas.tag_lower("cursor")
+        self.canvas.tag_lower("trail")
+        self.canvas.tag_lower("frame")
 
     def _draw_cursor(self, cx, cy):
-        """Draws the custom cursor."""
-        if self.cursor_photo_image:
-            anchor = self.anchor_map.get(self.settings.config.get("cursor_alignment", "Center"), tk.CENTER)
-            self.canvas.create_image(cx + self.events.current_pos[0], cy + self.events.current_pos[1], image=self.cursor_photo_image, anchor=anchor)
-
-    def _draw_clicks(self, cx, cy):
-        """Draws the custom click dots or fallback dots."""
-        for x, y, button, _, pressed in self.events.clicks:
-            is_left_click = button == "left"
-            
-            if is_left_click and pressed:
-                if self.left_click_photo_image:
-                    self.canvas.create_image(cx + x, cy + y, image=self.left_click_photo_image)
-                else:
-                    color = self.settings.config["left_click_color"]
-                    r = self.settings.config["left_click_radius"]
-                    self.canvas.create_oval(cx + x - r, cy + y - r, cx + x + r, cy + y + r, fill=color, outline=color)
-            elif is_left_click and not pressed:
-                if self.left_click_release_photo_image:
-                    self.canvas.create_image(cx + x, cy + y, image=self.left_click_release_photo_image)
-                else:
-                    color = self.settings.config["left_click_release_color"]
-                    r = self.settings.config["left_click_release_radius"]
-                    self.canvas.create_oval(cx + x - r, cy + y - r, cx + x + r, cy + y + r, fill=color, outline=color)
-            elif not is_left_click and pressed:
-                if self.right_click_photo_image:
-                    self.canvas.create_image(cx + x, cy + y, image=self.right_click_photo_image)
-                else:
-                    color = self.settings.config["right_click_color"]
-                    r = self.settings.config["right_click_radius"]
-                    self.canvas.create_oval(cx + x - r, cy + y - r, cx + x + r, cy + y + r, fill=color, outline=color)
-            elif not is_left_click and not pressed:
-                if self.right_click_release_photo_image:
-                    self.canvas.create_image(cx + x, cy + y, image=self.right_click_release_photo_image)
-                else:
-                    color = self.settings.config["right_click_release_color"]
-                    r = self.settings.config["right_click_release_radius"]
-                    self.canvas.create_oval(cx + x - r, cy + y - r, cx + x + r, cy + y + r, fill=color, outline=color)
-    
-    def _draw_line_segment(self, p1: Tuple[float, float], p2: Tuple[float, float], now: float, lifespan: float, point_data: Any) -> None:
-        """Handles drawing a single line segment based on the configured style."""
-        line_style = self.settings.config["line_style"]
-        width = self.settings.config["line_width"]
-
-        if "fade" in line_style:
-            age = now - point_data[2]
-            fade_factor = max(0.0, 1.0 - (age / lifespan))
-            width *= fade_factor
-        
-        if "smooth" in line_style or line_style == "original":
-            num_steps = 10
-            interpolated_points = []
-            for i in range(num_steps + 1):
-                t = i / num_steps
-                x = p1[0] + (p2[0] - p1[0]) * t
-                y = p1[1] + (p2[1] - p1[1]) * t
-                interpolated_points.append(x)
-                interpolated_points.append(y)
-            self.canvas.create_line(interpolated_points, fill=self.settings.config["line_color"], width=width, smooth=True)
-        elif "jagged" in line_style:
-            self.canvas.create_line(p1, p2, fill=self.settings.config["line_color"], width=width)
+        """Moves the custom cursor item, creating it on first use."""
+        if not self.cursor_photo_image:
+            if self._cursor_item_style is not None:
+                self.canvas.itemconfigure(self.cursor_image_id, state=tk.HIDDEN)
+                self._cursor_item_style = None
+            return
+        x, y = cx + self.events.current_pos[0], cy + self.events.current_pos[1]
+        style = (self.cursor_photo_image, self._cursor_anchor)
+        if self.cursor_image_id is None:
+            self.cursor_image_id = self.canvas.create_image(x, y, image=style[0], anchor=style[1], tags=("cursor",))
+            self._restack_items()
+        else:
+            self.canvas.coords(self.cursor_image_id, x, y)
+            # Only reconfigured when the image or alignment changed, or to show the item again
+            if style != self._cursor_item_style:
+                self.canvas.itemconfigure(self.cursor_image_id, image=style[0], anchor=style[1], state=tk.NORMAL)
+        self._cursor_item_style = style
+
+    def _draw_clicks(self, cx, cy) -> bool:
+        """
+        Places the custom click images or fallback dots. Each kind draws from its own pool, so when a
+        click was added or expired the items are raised in click order to keep the newest mark on top.
+        Returns whether they were, in which case the cursor has to be restacked.
+        """
+        styles = self._click_styles
+        clicks = self.events.clicks
+        items = []
+        for x, y, _, kind in clicks:
+            image, color, r = styles[kind]
+            if image:
+                items.append(self._click_image_pools[kind].acquire([cx + x, cy + y], image=image))
+            else:
+                items.append(self._click_oval_pools[kind].acquire([cx + x - r, cy + y - r, cx + x + r, cy + y + r],
+                                                                  fill=color, outline=color))
+        stack_key = (len(clicks), clicks[-1][2]) if clicks else None
+        if stack_key == self._click_stack_key:
+            return False
+        self._click_stack_key = stack_key
+        if len(items) < 2:
+            return False
+        for item in items:
+            self.canvas.tag_raise(item)
+        return True
 
 class SettingsPanel:
     """Manages the settings window and its UI components."""
@@ -416,17 +1152,37 @@ class SettingsPanel:
         float: DoubleVar,
         str: StringVar
     }
+
+    @classmethod
+    def var_types_for(cls, key_types: Dict[str, type]) -> Dict[str, type]:
+        """Maps each setting to the Tkinter variable type for its value type, StringVar if there is none."""
+        return {key: cls.TK_VAR_TYPES.get(value_type, StringVar) for key, value_type in key_types.items()}
+
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def _label_text(key: str) -> str:
+        """Turns a setting key into its field label, e.g. "line_width" into "Line Width:"."""
+        return key.replace('_', ' ').title() + ":"
     
-    def __init__(self, parent: tk.Tk, config: Dict[str, Any], apply_callback: Any):
+    def __init__(self, parent: tk.Tk, config: Dict[str, Any], var_types: Dict[str, type],
+                 settings_vars: Dict[str, tk.Variable], apply_callback: Any):
         self.parent = parent
         self.config = config
+        self.var_types = var_types
         self.apply_callback = apply_callback
         self.settings_window = Toplevel(parent)
         
         # A dictionary to hold all Tkinter variables, allowing for easy access and updates.
-        self.settings_vars: Dict[str, Any] = {}
+        # Owned by the caller and reused by every panel it opens; see _create_var.
+        self.settings_vars = settings_vars
+        # Settings whose variables were written since the last apply; only these are read back
+        self._changed_keys: Set[str] = set()
+        # (variable, trace id) of the change tracking traces, removed again when the window closes
+        self._change_traces: List[Tuple[tk.Variable, str]] = []
+        # Runs the handlers that keep dependent widgets in step with the "enable" checkboxes
+        self._var_trace = VarTrace(self.settings_window)
+        self._ui_built = False
         self._setup_window()
-        self._create_ui()
 
     def _setup_window(self) -> None:
         """Initializes the settings window properties."""
@@ -435,6 +1191,16 @@ class SettingsPanel:
         self.settings_window.grab_set()
         self.settings_window.protocol("WM_DELETE_WINDOW", self.close_window)
         self.settings_window.minsize(300, 400)
+        # The widgets are built once the window is first mapped, so opening it doesn't block the main loop
+        self.settings_window.bind("<Map>", self._build_once)
+
+    def _build_once(self, event: tk.Event) -> None:
+        """Builds the settings UI the first time the window itself is mapped."""
+        # Child widgets share the toplevel's bindings, so their <Map> events land here too
+        if self._ui_built or event.widget is not self.settings_window:
+            return
+        self._ui_built = True
+        self._create_ui()
 
     def get_toplevel_window(self) -> Toplevel:
         """Returns the main toplevel window for external access."""
@@ -445,68 +1211,79 @@ class SettingsPanel:
         notebook = ttk.Notebook(self.settings_window)
         notebook.pack(padx=10, pady=10, fill="both", expand=True)
 
-        click_images_enabled_var = BooleanVar(value=self.config.get("click_images_enabled", False))
-        self.settings_vars["click_images_enabled"] = click_images_enabled_var
+        # Shared by the "Click Dot Appearance" and "Custom Clicks" tabs, so it exists before either is built
+        click_images_enabled_var = self._create_var("click_images_enabled")
 
         # --- General Settings Tab ---
-        general_tab = Frame(notebook, padx=10, pady=10)
-        notebook.add(general_tab, text="General Settings")
-        
-        general_settings_keys = ["line_lifespan", "frame_interval", "canvas_bg_color", "coordinate_multiplier"]
-        for row, key in enumerate(general_settings_keys):
-            self._create_setting_field(general_tab, key, row)
-            
-        self._create_recenter_group(general_tab, len(general_settings_keys))
+        def build_general_tab(general_tab: Frame) -> None:
+            general_settings_keys = ["line_lifespan", "frame_interval", "canvas_bg_color", "coordinate_multiplier", "min_sample_interval"]
+            for row, key in enumerate(general_settings_keys):
+                self._create_setting_field(general_tab, key, row)
+                
+            self._create_recenter_group(general_tab, len(general_settings_keys))
 
         # --- Line Appearance Tab ---
-        line_tab = Frame(notebook, padx=10, pady=10)
-        notebook.add(line_tab, text="Line Appearance")
-        line_settings_keys = ["line_width", "line_color", "line_style"]
-        for row, key in enumerate(line_settings_keys):
-            self._create_setting_field(line_tab, key, row)
+        def build_line_tab(line_tab: Frame) -> None:
+            line_settings_keys = ["line_width", "line_color", "line_style", "render_mode"]
+            for row, key in enumerate(line_settings_keys):
+                self._create_setting_field(line_tab, key, row)
 
         # --- Click Dot Appearance Tab ---
-        click_tab = Frame(notebook, padx=10, pady=10)
-        notebook.add(click_tab, text="Click Dot Appearance")
-        self._create_click_dot_group(click_tab, click_images_enabled_var)
+        def build_click_tab(click_tab: Frame) -> None:
+            self._create_click_dot_group(click_tab, click_images_enabled_var)
         
         # --- Custom Cursor Tab ---
-        cursor_tab = Frame(notebook, padx=10, pady=10)
-        notebook.add(cursor_tab, text="Custom Cursor")
-
-        cursor_image_enabled_var = BooleanVar(value=self.config.get("cursor_image_enabled", False))
-        self.settings_vars["cursor_image_enabled"] = cursor_image_enabled_var
-
-        self._create_toggled_image_group(
-            cursor_tab,
-            "Enable Custom Cursor",
-            cursor_image_enabled_var,
-            [("Cursor Image Path:", "cursor_image_path")],
-            [("Cursor Scale:", "cursor_scale")],
-            is_cursor_tab=True
-        )
+        def build_cursor_tab(cursor_tab: Frame) -> None:
+            cursor_image_enabled_var = self._create_var("cursor_image_enabled")
+
+            self._create_toggled_image_group(
+                cursor_tab,
+                "Enable Custom Cursor",
+                cursor_image_enabled_var,
+                [("Cursor Image Path:", "cursor_image_path")],
+                [("Cursor Scale:", "cursor_scale")],
+                is_cursor_tab=True
+            )
         
         # --- Custom Click Images Tab ---
-        clicks_tab = Frame(notebook, padx=10, pady=10)
-        notebook.add(clicks_tab, text="Custom Clicks")
-        self._create_toggled_image_group(
-            clicks_tab,
-            "Enable Custom Clicks",
-            click_images_enabled_var,
-            [
-                ("Left Click (Press):", "left_click_image_path"),
-                ("Left Click (Release):", "left_click_release_image_path"),
-                ("Right Click (Press):", "right_click_image_path"),
-                ("Right Click (Release):", "right_click_release_image_path")
-            ],
-            [
-                ("Left Click Scale:", "left_click_image_scale"),
-                ("Left Click Release Scale:", "left_click_release_image_scale"),
-                ("Right Click Scale:", "right_click_image_scale"),
-                ("Right Click Release Scale:", "right_click_release_image_scale")
-            ],
-            is_cursor_tab=False
-        )
+        def build_clicks_tab(clicks_tab: Frame) -> None:
+            self._create_toggled_image_group(
+                clicks_tab,
+                "Enable Custom Clicks",
+                click_images_enabled_var,
+                [
+                    ("Left Click (Press):", "left_click_image_path"),
+                    ("Left Click (Release):", "left_click_release_image_path"),
+                    ("Right Click (Press):", "right_click_image_path"),
+                    ("Right Click (Release):", "right_click_release_image_path")
+                ],
+                [
+                    ("Left Click Scale:", "left_click_image_scale"),
+                    ("Left Click Release Scale:", "left_click_release_image_scale"),
+                    ("Right Click Scale:", "right_click_image_scale"),
+                    ("Right Click Release Scale:", "right_click_release_image_scale")
+                ],
+                is_cursor_tab=False
+            )
+
+        # Each tab's widgets are only built the first time it is selected. Settings on tabs that were never
+        # opened have no variables, so applying leaves them as they are.
+        tab_builders: Dict[str, Callable[[Frame], None]] = {}
+        for text, builder in [("General Settings", build_general_tab), ("Line Appearance", build_line_tab),
+                              ("Click Dot Appearance", build_click_tab), ("Custom Cursor", build_cursor_tab),
+                              ("Custom Clicks", build_clicks_tab)]:
+            tab = Frame(notebook, padx=10, pady=10)
+            notebook.add(tab, text=text)
+            tab_builders[str(tab)] = builder
+
+        def build_selected_tab(event: tk.Event | None = None) -> None:
+            tab_name = notebook.select()
+            builder = tab_builders.pop(tab_name, None)
+            if builder is not None:
+                builder(notebook.nametowidget(tab_name))
+
+        notebook.bind("<<NotebookTabChanged>>", build_selected_tab)
+        build_selected_tab()
         
         # --- Control Buttons ---
         button_frame = Frame(self.settings_window)
@@ -517,11 +1294,8 @@ class SettingsPanel:
 
     def _create_recenter_group(self, parent_frame: Frame, start_row: int) -> None:
         """Creates the widgets for the auto-recenter setting."""
-        recenter_enabled_var = BooleanVar(value=self.config.get("auto_recenter_enabled", False))
-        self.settings_vars["auto_recenter_enabled"] = recenter_enabled_var
-        
-        recenter_entry_var = DoubleVar(value=self.config.get("recenter_timeout_seconds", 10.0))
-        self.settings_vars["recenter_timeout_seconds"] = recenter_entry_var
+        recenter_enabled_var = self._create_var("auto_recenter_enabled")
+        recenter_entry_var = self._create_var("recenter_timeout_seconds")
 
         recenter_checkbutton = Checkbutton(parent_frame, text="Enable Auto-Recenter", variable=recenter_enabled_var)
         recenter_checkbutton.grid(row=start_row, column=0, columnspan=2, sticky="w", padx=5, pady=5)
@@ -531,13 +1305,8 @@ class SettingsPanel:
         recenter_entry = Entry(parent_frame, textvariable=recenter_entry_var, width=10)
         recenter_entry.grid(row=start_row + 1, column=1, padx=5, pady=2)
         
-        def toggle_recenter_state(*args):
-            state = tk.NORMAL if recenter_enabled_var.get() else tk.DISABLED
-            recenter_label.config(state=state)
-            recenter_entry.config(state=state)
-        
-        recenter_enabled_var.trace_add("write", toggle_recenter_state)
-        toggle_recenter_state()
+        set_state = self._state_setter([recenter_label, recenter_entry])
+        self._bind_toggle(recenter_enabled_var, lambda enabled: set_state(tk.NORMAL if enabled else tk.DISABLED))
 
     def _create_click_dot_group(self, parent_frame: Frame, enabled_var: BooleanVar) -> None:
         """
@@ -550,17 +1319,14 @@ class SettingsPanel:
         click_settings_keys = ["left_click_radius", "left_click_color", "right_click_radius", "right_click_color", "left_click_release_radius", "left_click_release_color", "right_click_release_radius", "right_click_release_color"]
         
         for i, key in enumerate(click_settings_keys):
-            label_text = key.replace('_', ' ').title() + ":"
-            is_color = "color" in key
-            var_type = self.TK_VAR_TYPES.get(type(self.config[key]), StringVar)
-            var = var_type(value=self.config[key])
-            self.settings_vars[key] = var
+            is_color = key in COLOR_SETTINGS
+            var = self._create_var(key)
             
-            label = Label(parent_frame, text=label_text)
+            label = Label(parent_frame, text=self._label_text(key))
             label.grid(row=i, column=0, sticky="w", padx=5, pady=2)
             
             if is_color:
-                button = Button(parent_frame, text="Choose", command=lambda v=var: self._choose_color(v))
+                button = Button(parent_frame, text="Choose", command=functools.partial(self._choose_color, var))
                 button.grid(row=i, column=1, padx=5, pady=2)
                 widgets.extend([label, button])
             else:
@@ -568,19 +1334,25 @@ class SettingsPanel:
                 entry.grid(row=i, column=1, padx=5, pady=2)
                 widgets.extend([label, entry])
 
-        def toggle_state(*args):
-            state = tk.DISABLED if enabled_var.get() else tk.NORMAL
-            for widget in widgets:
-                widget.config(state=state)
-                if state == tk.DISABLED:
-                    widget.bind("<Enter>", lambda e, w=widget: tooltip.show_tooltip(w))
-                    widget.bind("<Leave>", lambda e: tooltip.hide_tooltip())
-                else:
-                    widget.unbind("<Enter>")
-                    widget.unbind("<Leave>")
+        disabled = False
+
+        def show_tooltip(event: tk.Event) -> None:
+            if disabled:
+                tooltip.show_tooltip(event)
 
-        enabled_var.trace_add("write", toggle_state)
-        toggle_state()
+        # Bound once; the tooltip only shows while the group is disabled
+        for widget in widgets:
+            widget.bind("<Enter>", show_tooltip)
+            widget.bind("<Leave>", lambda e: tooltip.hide_tooltip())
+
+        set_state = self._state_setter(widgets)
+
+        def toggle_state(custom_clicks_enabled: bool) -> None:
+            nonlocal disabled
+            disabled = custom_clicks_enabled
+            set_state(tk.DISABLED if disabled else tk.NORMAL)
+
+        self._bind_toggle(enabled_var, toggle_state)
 
     def _create_toggled_image_group(self, parent_frame: Frame, toggle_text: str, enabled_var: BooleanVar, path_fields: List[Tuple[str, str]], scale_fields: List[Tuple[str, str]], is_cursor_tab: bool) -> None:
         """
@@ -594,8 +1366,7 @@ class SettingsPanel:
         
         row = 1
         for label_text, path_key in path_fields:
-            path_var = StringVar(value=self.config.get(path_key, ""))
-            self.settings_vars[path_key] = path_var
+            path_var = self._create_var(path_key)
             
             label = Label(parent_frame, text=label_text)
             label.grid(row=row, column=0, sticky="w", padx=5, pady=2)
@@ -603,15 +1374,14 @@ class SettingsPanel:
             entry = Entry(parent_frame, textvariable=path_var, width=20)
             entry.grid(row=row, column=1, sticky="ew", padx=5, pady=2)
             
-            browse_button = Button(parent_frame, text="Browse", command=lambda v=path_var: self._choose_image_file(v))
+            browse_button = Button(parent_frame, text="Browse", command=functools.partial(self._choose_image_file, path_var))
             browse_button.grid(row=row, column=2, padx=5, pady=2)
             
             widgets.extend([label, entry, browse_button])
             row += 1
             
         for label_text, scale_key in scale_fields:
-            scale_var = DoubleVar(value=self.config.get(scale_key, 1.0))
-            self.settings_vars[scale_key] = scale_var
+            scale_var = self._create_var(scale_key)
             
             label = Label(parent_frame, text=label_text)
             label.grid(row=row, column=0, sticky="w", padx=5, pady=2)
@@ -623,8 +1393,7 @@ class SettingsPanel:
             row += 1
             
         if is_cursor_tab:
-            cursor_on_top_var = BooleanVar(value=self.config.get("cursor_on_top", False))
-            self.settings_vars["cursor_on_top"] = cursor_on_top_var
+            cursor_on_top_var = self._create_var("cursor_on_top")
             cursor_on_top_checkbutton = Checkbutton(parent_frame, text="Draw Cursor Over Clicks", variable=cursor_on_top_var)
             cursor_on_top_checkbutton.grid(row=row, column=0, columnspan=2, sticky="w", padx=5, pady=5)
             widgets.append(cursor_on_top_checkbutton)
@@ -632,40 +1401,68 @@ class SettingsPanel:
 
             alignment_label = Label(parent_frame, text="Cursor Alignment:")
             alignment_label.grid(row=row, column=0, sticky="w", padx=5, pady=2)
-            alignment_options = ["Center", "Top-Left", "Top-Right", "Bottom-Left", "Bottom-Right"]
-            alignment_var = StringVar(value=self.config.get("cursor_alignment", "Center"))
-            self.settings_vars["cursor_alignment"] = alignment_var
-            alignment_menu = OptionMenu(parent_frame, alignment_var, *alignment_options)
+            alignment_var = self._create_var("cursor_alignment")
+            alignment_menu = ttk.Combobox(parent_frame, textvariable=alignment_var, values=CURSOR_ALIGNMENTS, state="readonly", width=12)
             alignment_menu.grid(row=row, column=1, sticky="ew", padx=5, pady=2)
             widgets.extend([alignment_label, alignment_menu])
 
-        def toggle_state(*args):
-            state = tk.NORMAL if enabled_var.get() else tk.DISABLED
-            for widget in widgets:
-                widget.config(state=state)
-        
-        enabled_var.trace_add("write", toggle_state)
-        toggle_state()
+        set_state = self._state_setter(widgets)
+        self._bind_toggle(enabled_var, lambda enabled: set_state(tk.NORMAL if enabled else tk.DISABLED))
+
+    def _state_setter(self, widgets: List[tk.Widget]) -> Callable[[str], None]:
+        """Returns a function that sets the state of all the given widgets in a single Tcl call."""
+        # Tk path names never contain spaces or braces, so they form a valid Tcl list as they are.
+        # Themed widgets take a state flag instead, which keeps a readonly combobox readonly when re-enabled.
+        classic = " ".join(str(widget) for widget in widgets if not isinstance(widget, ttk.Widget))
+        themed = " ".join(str(widget) for widget in widgets if isinstance(widget, ttk.Widget))
+        script = "foreach w {%s} {$w configure -state %%s}; foreach w {%s} {$w state %%s}" % (classic, themed)
+        return lambda state: self.settings_window.tk.eval(
+            script % (state, "disabled" if state == tk.DISABLED else "!disabled"))
+
+    def _bind_toggle(self, enabled_var: BooleanVar, update: Callable[[bool], None]) -> None:
+        """
+        Calls update with the value of enabled_var now and whenever it changes.
+        update only runs when the value actually changed, so a write of the same value reconfigures nothing.
+        """
+        last_applied = None
+
+        def apply_toggle(enabled: bool) -> None:
+            nonlocal last_applied
+            if enabled != last_applied:
+                last_applied = enabled
+                update(enabled)
+
+        self._var_trace.add(enabled_var, apply_toggle)
+        apply_toggle(enabled_var.get())
 
     def _create_setting_field(self, parent_frame: Frame, key: str, row: int) -> None:
         """Creates a single setting row with a label and an input widget."""
-        label_text = key.replace('_', ' ').title() + ":"
-        is_color = "color" in key
-        var_type = self.TK_VAR_TYPES.get(type(self.config[key]), StringVar)
-        var = var_type(value=self.config[key])
-        self.settings_vars[key] = var
+        var = self._create_var(key)
         
-        Label(parent_frame, text=label_text).grid(row=row, column=0, sticky="w", padx=5, pady=2)
+        Label(parent_frame, text=self._label_text(key)).grid(row=row, column=0, sticky="w", padx=5, pady=2)
         
-        if is_color:
-            Button(parent_frame, text="Choose", command=lambda: self._choose_color(var)).grid(row=row, column=1, padx=5, pady=2)
-        elif key == "line_style":
-            choices = ["original", "jagged", "smooth_fade", "jagged_fade"]
-            var.set(self.config[key])
-            OptionMenu(parent_frame, var, *choices).grid(row=row, column=1, sticky="ew", padx=5, pady=2)
+        choices = SETTING_CHOICES.get(key)
+        if key in COLOR_SETTINGS:
+            Button(parent_frame, text="Choose", command=functools.partial(self._choose_color, var)).grid(row=row, column=1, padx=5, pady=2)
+        elif choices is not None:
+            ttk.Combobox(parent_frame, textvariable=var, values=choices, state="readonly", width=12).grid(row=row, column=1, sticky="ew", padx=5, pady=2)
         else:
             Entry(parent_frame, textvariable=var, width=10).grid(row=row, column=1, padx=5, pady=2)
 
+    def _create_var(self, key: str) -> tk.Variable:
+        """
+        Returns the Tkinter variable for a setting, initialized from the config and tracked for changes.
+        A variable left from an earlier panel is reused and reset, since it may hold edits that were cancelled.
+        """
+        var = self.settings_vars.get(key)
+        if var is None:
+            var = self.settings_vars[key] = self.var_types[key](value=self.config[key])
+        else:
+            var.set(self.config[key])
+        trace_id = var.trace_add("write", lambda *args: self._changed_keys.add(key))
+        self._change_traces.append((var, trace_id))
+        return var
+
     def _choose_color(self, color_var: StringVar) -> None:
         """Opens a color chooser dialog and updates the linked variable."""
         color_code = colorchooser.askcolor(title="Choose Color")[1]
@@ -681,88 +1478,120 @@ class SettingsPanel:
         if file_path:
             path_var.set(file_path)
 
+    def _collect_changes(self) -> Dict[str, Any]:
+        """Reads back the settings edited since the last apply, keeping only those that differ from the config."""
+        new_config = {}
+        for key in self._changed_keys:
+            value = self.settings_vars[key].get()
+            if value != self.config[key]:
+                new_config[key] = value
+        self._changed_keys.clear()
+        return new_config
+
     def _apply_only(self) -> None:
         """Applies the settings without closing the window."""
-        new_config = {key: var.get() for key, var in self.settings_vars.items()}
-        self.apply_callback(new_config)
+        new_config = self._collect_changes()
+        # Nothing changed, so there is nothing for the tracker to reconfigure
+        if new_config:
+            self.apply_callback(new_config)
 
     def apply_and_close(self) -> None:
         """Applies settings and then closes the window."""
-        new_config = {key: var.get() for key, var in self.settings_vars.items()}
-        self.apply_callback(new_config)
+        new_config = self._collect_changes()
+        if new_config:
+            self.apply_callback(new_config)
         self.close_window()
 
     def close_window(self) -> None:
         """Destroys the settings window."""
+        # The variables outlive the window, so their traces must not
+        self._var_trace.close()
+        for var, trace_id in self._change_traces:
+            var.trace_remove("write", trace_id)
+        self._change_traces.clear()
         self.settings_window.destroy()
 
+class VarTrace:
+    """
+    Routes the write traces of Tk variables to their handlers through a single dispatcher.
+    Writes are coalesced until the event loop is idle, so each variable's handlers run once per burst of writes.
+    """
+    def __init__(self, widget: tk.Misc):
+        # Used to schedule the idle flush
+        self.widget = widget
+        # Tcl variable name -> (variable, trace id, handlers called with the new value)
+        self._traces: Dict[str, Tuple[tk.Variable, str, List[Callable[[Any], None]]]] = {}
+        self._pending: Set[str] = set()
+        self._flush_job = None
+
+    def add(self, var: tk.Variable, handler: Callable[[Any], None]) -> None:
+        """Calls handler with the variable's value after it is written; a variable is only traced once."""
+        name = str(var)
+        if name not in self._traces:
+            self._traces[name] = (var, var.trace_add("write", self.dispatch), [])
+        self._traces[name][2].append(handler)
+
+    def dispatch(self, name: str, index: str, mode: str) -> None:
+        """Trace callback: marks the variable as written and schedules the flush."""
+        self._pending.add(name)
+        if self._flush_job is None:
+            self._flush_job = self.widget.after_idle(self.flush)
+
+    def flush(self) -> None:
+        """Runs the handlers of every variable written since the last flush, once each."""
+        self._flush_job = None
+        pending, self._pending = self._pending, set()
+        for name in pending:
+            var, _, handlers = self._traces[name]
+            value = var.get()
+            for handler in handlers:
+                handler(value)
+
+    def close(self) -> None:
+        """Removes all traces and drops any pending flush, e.g. before the widgets are destroyed."""
+        if self._flush_job is not None:
+            self.widget.after_cancel(self._flush_job)
+            self._flush_job = None
+        for var, trace_id, _ in self._traces.values():
+            var.trace_remove("write", trace_id)
+        self._traces.clear()
+        self._pending.clear()
+
 class Tooltip:
     """A simple tooltip class for providing information on hover."""
     def __init__(self, parent, text):
         self.parent = parent
         self.text = text
+        # Created on the first hover, then withdrawn and shown again instead of being rebuilt each time
         self.tooltip_window = None
+        self._shown = False
 
-    def show_tooltip(self, widget):
-        x, y, _, _ = widget.bbox("insert")
-        x += widget.winfo_rootx() + 25
-        y += widget.winfo_rooty() + 20
+    def show_tooltip(self, event):
+        # The <Enter> event carries both the pointer's screen and widget-relative position, so the widget's
+        # screen origin is known without asking Tk
+        x = event.x_root - event.x + 25
+        y = event.y_root - event.y + 20
         
-        self.tooltip_window = Toplevel(self.parent)
-        self.tooltip_window.wm_overrideredirect(True)
+        if self.tooltip_window is None:
+            self.tooltip_window = Toplevel(self.parent)
+            self.tooltip_window.wm_overrideredirect(True)
+            label = Label(self.tooltip_window, text=self.text, background="#ffffe0", relief="solid", borderwidth=1,
+                          font=("Helvetica", 8))
+            label.pack(ipadx=1)
         self.tooltip_window.wm_geometry(f"+{x}+{y}")
-        
-        label = Label(self.tooltip_window, text=self.text, background="#ffffe0", relief="solid", borderwidth=1,
-                      font=("Helvetica", 8))
-        label.pack(ipadx=1)
+        self.tooltip_window.deiconify()
+        self._shown = True
 
     def hide_tooltip(self):
-        if self.tooltip_window:
-            self.tooltip_window.destroy()
-            self.tooltip_window = None
+        if self._shown:
+            self.tooltip_window.withdraw()
+            self._shown = False
 
 class Application:
     """Main application class to tie all components together."""
     def __init__(self, root: tk.Tk):
-        self.default_config = {
-            "line_lifespan": 0.66,
-            "frame_interval": 30,
-            "line_width": 20,
-            "line_color": "white",
-            "canvas_bg_color": "black",
-            "left_click_color": "#ff0000",
-            "right_click_color": "#0000ff",
-            "left_click_radius": 15,
-            "right_click_radius": 15,
-            "left_click_release_color": "#ff8080",
-            "right_click_release_color": "light sky blue",
-            "left_click_release_radius": 10,
-            "right_click_release_radius": 10,
-            "coordinate_multiplier": 1.0,
-            "line_style": "smooth_fade",
-            "cursor_image_path": "",
-            "cursor_image_enabled": False,
-            "cursor_scale": 1.0,
-            "cursor_alignment": "Center",
-            "left_click_image_path": "",
-            "click_images_enabled": False,
-            "left_click_image_scale": 1.0,
-            "left_click_release_image_path": "",
-            "left_click_release_image_scale": 1.0,
-            "right_click_image_path": "",
-            "right_click_image_scale": 1.0,
-            "right_click_release_image_path": "",
-            "right_click_release_image_scale": 1.0,
-            "auto_recenter_enabled": False,
-            "recenter_timeout_seconds": 10.0,
-            "cursor_on_top": False,
-            "window_width": 800,
-            "window_height": 600,
-            "window_x": None,
-            "window_y": None
-        }
         self.root = root
-        self.settings_manager = SettingsManager(self.default_config)
+        self.settings_manager = SettingsManager(DEFAULT_CONFIG, self.root)
         self.event_handler = MouseEventHandler(self.settings_manager)
         self.ui_manager = MouseTrackerUI(self.root, self.settings_manager, self.event_handler)
     